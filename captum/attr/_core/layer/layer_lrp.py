@@ -272,9 +272,16 @@ class LayerLRP(LRP, LayerAttribution):
         self, layer: Module, output: Tensor
     ) -> Union[Tensor, Tuple[Tensor, ...]]:
         if self.attribute_to_layer_input:
+            # Stored per device as a list with one slot per layer input;
+            # unwrap single-input layers to a plain tensor.
             normalized_relevances = cast(
                 Dict[torch.device, Tensor],
-                cast(PropagationRule, layer.rule).relevance_input,
+                {
+                    device: relevance[0] if len(relevance) == 1 else tuple(relevance)
+                    for device, relevance in cast(
+                        PropagationRule, layer.rule
+                    ).relevance_input.items()
+                },
             )
         else:
             normalized_relevances = cast(PropagationRule, layer.rule).relevance_output
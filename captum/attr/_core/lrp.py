@@ -3,7 +3,6 @@
 # pyre-strict
 
 import typing
-from collections import defaultdict
 from typing import Any, Callable, cast, Dict, List, Literal, Optional, Tuple, Union
 
 import torch.nn as nn
@@ -61,6 +60,19 @@ class LRP(GradientAttribution):
         """
         GradientAttribution.__init__(self, model)
         self.model = model
+        # Registries shared with the rules of this instance for the duration
+        # of one attribution call; instance-level so that concurrent LRP
+        # instances cannot consume or clear each other's entries.
+        # _grad_replacements holds the relevances computed by the rules'
+        # input hooks, keyed by id of the grad tensor they replace, so that
+        # _backward_hook_activation (a second hook on the same tensor) can
+        # pick them up. _hooked_inputs records input tensors that already
+        # carry a backward hook, so a tensor feeding several rule-bearing
+        # modules (e.g. a skip connection) is hooked only once. Both store
+        # the tensor itself to pin it alive, preventing id recycling, and
+        # are cleared in _restore_model.
+        self._grad_replacements: Dict[int, Tuple[Tensor, Tensor]] = {}
+        self._hooked_inputs: Dict[int, Tensor] = {}
         self._check_rules()
 
     @property
@@ -298,14 +310,17 @@ class LRP(GradientAttribution):
         for layer in self.layers:
             if hasattr(layer, "rule"):
                 layer.activations = {}  # type: ignore
-                layer.rule.relevance_input = defaultdict(list)  # type: ignore
+                layer.rule.relevance_input = {}  # type: ignore
                 layer.rule.relevance_output = {}  # type: ignore
-                pass
+                layer.rule._grad_replacements = self._grad_replacements  # type: ignore
+                layer.rule._hooked_inputs = self._hooked_inputs  # type: ignore
             elif type(layer) in SUPPORTED_LAYERS_WITH_RULES.keys():
                 layer.activations = {}  # type: ignore
                 layer.rule = SUPPORTED_LAYERS_WITH_RULES[type(layer)]()  # type: ignore
-                layer.rule.relevance_input = defaultdict(list)  # type: ignore
+                layer.rule.relevance_input = {}  # type: ignore
                 layer.rule.relevance_output = {}  # type: ignore
+                layer.rule._grad_replacements = self._grad_replacements  # type: ignore
+                layer.rule._hooked_inputs = self._hooked_inputs  # type: ignore
             elif type(layer) in SUPPORTED_NON_LINEAR_LAYERS:
                 layer.rule = None  # type: ignore
             else:
@@ -335,8 +350,13 @@ class LRP(GradientAttribution):
     def _register_forward_hooks(self) -> None:
         for layer in self.layers:
             if type(layer) in SUPPORTED_NON_LINEAR_LAYERS:
+                # Tensor-hook emulation via _register_backward_hook is
+                # deliberate: register_full_backward_hook fails on in-place
+                # activations (e.g. ReLU(inplace=True)) and only fires after
+                # grad_input is computed from the unmodified grad_output,
+                # which would bypass the rules' output-side relevance math.
                 backward_handles = _register_backward_hook(
-                    layer, PropagationRule.backward_hook_activation, self
+                    layer, self._backward_hook_activation, self
                 )
                 self.backward_handles.extend(backward_handles)
             else:
@@ -347,6 +367,15 @@ class LRP(GradientAttribution):
                 if self.verbose:
                     print(f"Applied {layer.rule} on layer {layer}")
 
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _backward_hook_activation(self, module, grad_input, grad_output):
+        """Backward hook to propagate relevance over non-linear activations."""
+        # The replacement is recorded in the rules' _backward_hook_input; it
+        # is necessary due to 2 tensor hooks on the same tensor
+        entry = self._grad_replacements.pop(id(grad_output), None)
+        return grad_output if entry is None else entry[1]
+
     def _register_weight_hooks(self) -> None:
         for layer in self.layers:
             if layer.rule is not None:
@@ -409,10 +438,26 @@ class LRP(GradientAttribution):
                 del layer.activation
 
     def _restore_state(self) -> None:
+        # Rules manipulate parameter storages in-place and stash the original
+        # values on the module; those are copied back first, since the
+        # state_dict snapshot holds references to the mutated storages. The
+        # stash is removed once consumed so that it can only ever restore
+        # values captured during the current attribution call - a leftover
+        # stash would otherwise silently revert parameter updates (e.g.
+        # training steps) made between attribution calls.
+        for layer in self.layers:
+            for name in ("weight", "bias"):
+                stash_name = "_lrp_orig_" + name
+                stash = getattr(layer, stash_name, None)
+                if stash is not None:
+                    getattr(layer, name).data.copy_(stash)
+                    delattr(layer, stash_name)
         self.model.load_state_dict(self._original_state_dict)  # type: ignore
 
     def _restore_model(self) -> None:
         self._restore_state()
+        self._grad_replacements.clear()
+        self._hooked_inputs.clear()
         self._remove_backward_hooks()
         self._remove_forward_hooks()
         self._remove_rules()
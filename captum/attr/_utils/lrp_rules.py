@@ -2,92 +2,127 @@
 
 # pyre-strict
 
+import warnings
 from abc import ABC, abstractmethod
-from typing import cast, Dict, List, Union
+from typing import Dict, List, Tuple
 
 import torch
-from captum._utils.common import _format_tensor_into_tuples
 from torch import Tensor
 
 
+def _manipulate_weight_gamma(
+    weight: Tensor, orig_weight: Tensor, gamma: float
+) -> Tensor:
+    """In-place w + gamma * w.clamp(min=0); `weight` must still hold the
+    original values on entry."""
+    return weight.clamp_(min=0).mul_(gamma).add_(orig_weight)
+
+
+def _manipulate_weight_alpha1_beta0(weight: Tensor) -> Tensor:
+    """In-place w.clamp(min=0)."""
+    return weight.clamp_(min=0)
+
+
+# Scripted outside the decorator syntax so the DeprecationWarning newer
+# PyTorch releases emit for torch.jit.script does not surface at import time.
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    _manipulate_weight_gamma = torch.jit.script(_manipulate_weight_gamma)
+    _manipulate_weight_alpha1_beta0 = torch.jit.script(_manipulate_weight_alpha1_beta0)
+
+
+# pyre-fixme[2]: Parameter must be annotated.
+def _stash_parameter(module, name: str) -> Tensor:
+    """Cache the original data of parameter `name` on the module so rules can
+    manipulate the live storage in-place. The LRP driver restores the
+    parameter from the stash and removes the stash again after every
+    attribution call, so a stash never outlives the run that created it."""
+    param_data = getattr(module, name).data
+    stash_name = "_lrp_orig_" + name
+    stash = getattr(module, stash_name, None)
+    if stash is None:
+        stash = param_data.clone()
+        setattr(module, stash_name, stash)
+    return stash
+
+
 class PropagationRule(ABC):
     """
     Base class for all propagation rule classes, also called Z-Rule.
     STABILITY_FACTOR is used to assure that no zero divison occurs.
     """
 
-    relevance_input: Dict[torch.device, Union[torch.Tensor, List[torch.Tensor]]] = {}
-    relevance_output: Dict[torch.device, torch.Tensor] = {}
-
     STABILITY_FACTOR = 1e-9
 
+    def __init__(self) -> None:
+        # Keyed by device so DataParallel replicas fill independent slots
+        # instead of racing on shared class-level state. Each device maps to
+        # a list with one slot per layer input, preallocated in forward_hook.
+        self.relevance_input: Dict[torch.device, List[torch.Tensor]] = {}
+        self.relevance_output: Dict[torch.device, torch.Tensor] = {}
+        # Hand-off registries, replaced by the LRP driver with dicts it owns
+        # so that all rules of one attribution run share a single registry
+        # while concurrent runs on other models stay isolated; see the driver
+        # for their semantics.
+        self._grad_replacements: Dict[int, Tuple[Tensor, Tensor]] = {}
+        self._hooked_inputs: Dict[int, Tensor] = {}
+
     # pyre-fixme[3]: Return type must be annotated.
     # pyre-fixme[2]: Parameter must be annotated.
     def forward_hook(self, module, inputs, outputs):
         """Register backward hooks on input and output
         tensors of linear layers in the model."""
-        inputs = _format_tensor_into_tuples(inputs)
-        # pyre-fixme[16]: `PropagationRule` has no attribute `_has_single_input`.
-        # pyre-fixme[6]: For 1st argument expected `pyre_extensions.ReadOnly[Sized]`
-        #  but got `None`.
-        self._has_single_input = len(inputs) == 1
+        inputs = inputs if isinstance(inputs, tuple) else (inputs,)
+        self.relevance_input[inputs[0].device] = [None] * len(inputs)
+        handles = []
+        for idx, input in enumerate(inputs):
+            if id(input) not in self._hooked_inputs:
+                # Capture detached views so the closures do not keep the
+                # autograd graph of the forward pass alive.
+                input_hook = self._create_backward_hook_input(input.detach(), idx)
+                handles.append(input.register_hook(input_hook))
+                self._hooked_inputs[id(input)] = input
+        # Kept only so the LRP driver can remove the hooks after attribution.
         # pyre-fixme[16]: `PropagationRule` has no attribute `_handle_input_hooks`.
-        self._handle_input_hooks = []
-        # pyre-fixme[16]: `None` has no attribute `__iter__`.
-        for input in inputs:
-            if not hasattr(input, "hook_registered"):
-                input_hook = self._create_backward_hook_input(input.data)
-                self._handle_input_hooks.append(input.register_hook(input_hook))
-                input.hook_registered = True
-        output_hook = self._create_backward_hook_output(outputs.data)
+        self._handle_input_hooks = tuple(handles)
+        output_hook = self._create_backward_hook_output(outputs.detach())
         # pyre-fixme[16]: `PropagationRule` has no attribute `_handle_output_hook`.
         self._handle_output_hook = outputs.register_hook(output_hook)
         return outputs.clone()
 
-    @staticmethod
     # pyre-fixme[3]: Return type must be annotated.
     # pyre-fixme[2]: Parameter must be annotated.
-    def backward_hook_activation(module, grad_input, grad_output):
-        """Backward hook to propagate relevance over non-linear activations."""
-        # replace_out is set in _backward_hook_input, this is necessary
-        # due to 2 tensor hooks on the same tensor
-        if hasattr(grad_output, "replace_out"):
-            hook_out = grad_output.replace_out
-            del grad_output.replace_out
-            return hook_out
-        return grad_output
-
-    # pyre-fixme[3]: Return type must be annotated.
-    # pyre-fixme[2]: Parameter must be annotated.
-    def _create_backward_hook_input(self, inputs):
+    def _create_backward_hook_input(self, inputs, idx: int = 0):
         # pyre-fixme[53]: Captured variable `inputs` is not annotated.
         # pyre-fixme[3]: Return type must be annotated.
         # pyre-fixme[2]: Parameter must be annotated.
         def _backward_hook_input(grad):
-            relevance = grad * inputs
-            device = grad.device
-            # pyre-fixme[16]: `PropagationRule` has no attribute `_has_single_input`.
-            if self._has_single_input:
-                self.relevance_input[device] = relevance.data
-            else:
-                cast(List[Tensor], self.relevance_input[device]).append(relevance.data)
-
-            # replace_out is needed since two hooks are set on the same tensor
-            # The output of this hook is needed in backward_hook_activation
-            grad.replace_out = relevance
+            # Out-of-place on purpose: tensor hooks must not mutate their
+            # argument, and grad may feed other consumers of the tensor.
+            relevance = grad.mul(inputs)
+            self.relevance_input[grad.device][idx] = relevance.detach()
+
+            # The output of this hook is needed in the driver's
+            # _backward_hook_activation, which fires as a second hook on the
+            # same tensor.
+            self._grad_replacements[id(grad)] = (grad, relevance)
             return relevance
 
         return _backward_hook_input
 
     # pyre-fixme[3]: Return type must be annotated.
     def _create_backward_hook_output(self, outputs: torch.Tensor):
+        eps = self.STABILITY_FACTOR
+        # The activations are fixed once the forward pass has run, so the
+        # stabilized denominator is computed here instead of on every backward
+        # call; zeros are treated as positive to avoid zero division.
+        denom = torch.where(outputs >= 0, outputs + eps, outputs - eps)
+
         # pyre-fixme[3]: Return type must be annotated.
         # pyre-fixme[2]: Parameter must be annotated.
         def _backward_hook_output(grad):
-            sign = torch.sign(outputs)
-            sign[sign == 0] = 1
-            relevance = grad / (outputs + sign * self.STABILITY_FACTOR)
-            self.relevance_output[grad.device] = grad.data
+            relevance = grad / denom
+            self.relevance_output[grad.device] = grad.detach()
             return relevance
 
         return _backward_hook_output
@@ -95,7 +130,8 @@ class PropagationRule(ABC):
     # pyre-fixme[2]: Parameter must be annotated.
     def forward_hook_weights(self, module, inputs, outputs) -> None:
         """Save initial activations a_j before modules are changed"""
-        device = inputs[0].device if isinstance(inputs, tuple) else inputs.device
+        inputs = inputs if isinstance(inputs, tuple) else (inputs,)
+        device = inputs[0].device
         if hasattr(module, "activations") and device in module.activations:
             raise RuntimeError(
                 "Module {} is being used more than once in the network, which "
@@ -116,7 +152,8 @@ class PropagationRule(ABC):
     # pyre-fixme[2]: Parameter must be annotated.
     def forward_pre_hook_activations(self, module, inputs):
         """Pass initial activations to graph generation pass"""
-        device = inputs[0].device if isinstance(inputs, tuple) else inputs.device
+        inputs = inputs if isinstance(inputs, tuple) else (inputs,)
+        device = inputs[0].device
         for input, activation in zip(inputs, module.activations[device]):
             input.data = activation
         return inputs
@@ -135,6 +172,7 @@ class EpsilonRule(PropagationRule):
     """
 
     def __init__(self, epsilon: float = 1e-9) -> None:
+        super().__init__()
         self.STABILITY_FACTOR = epsilon
 
     # pyre-fixme[2]: Parameter must be annotated.
@@ -155,18 +193,19 @@ class GammaRule(PropagationRule):
     """
 
     def __init__(self, gamma: float = 0.25, set_bias_to_zero: bool = False) -> None:
+        super().__init__()
         self.gamma = gamma
         self.set_bias_to_zero = set_bias_to_zero
 
     # pyre-fixme[2]: Parameter must be annotated.
     def _manipulate_weights(self, module, inputs, outputs) -> None:
         if hasattr(module, "weight"):
-            module.weight.data = (
-                module.weight.data + self.gamma * module.weight.data.clamp(min=0)
-            )
+            orig_weight = _stash_parameter(module, "weight")
+            _manipulate_weight_gamma(module.weight.data, orig_weight, self.gamma)
         if self.set_bias_to_zero and hasattr(module, "bias"):
             if module.bias is not None:
-                module.bias.data = torch.zeros_like(module.bias.data)
+                _stash_parameter(module, "bias")
+                module.bias.data.zero_()
 
 
 class Alpha1_Beta0_Rule(PropagationRule):
@@ -182,15 +221,18 @@ class Alpha1_Beta0_Rule(PropagationRule):
     """
 
     def __init__(self, set_bias_to_zero: bool = False) -> None:
+        super().__init__()
         self.set_bias_to_zero = set_bias_to_zero
 
     # pyre-fixme[2]: Parameter must be annotated.
     def _manipulate_weights(self, module, inputs, outputs) -> None:
         if hasattr(module, "weight"):
-            module.weight.data = module.weight.data.clamp(min=0)
+            _stash_parameter(module, "weight")
+            _manipulate_weight_alpha1_beta0(module.weight.data)
         if self.set_bias_to_zero and hasattr(module, "bias"):
             if module.bias is not None:
-                module.bias.data = torch.zeros_like(module.bias.data)
+                _stash_parameter(module, "bias")
+                module.bias.data.zero_()
 
 
 class IdentityRule(EpsilonRule):
@@ -204,10 +246,23 @@ class IdentityRule(EpsilonRule):
 
     # pyre-fixme[3]: Return type must be annotated.
     # pyre-fixme[2]: Parameter must be annotated.
-    def _create_backward_hook_input(self, inputs):
+    def _create_backward_hook_input(self, inputs, idx: int = 0):
         # pyre-fixme[3]: Return type must be annotated.
         # pyre-fixme[2]: Parameter must be annotated.
         def _backward_hook_input(grad):
             return self.relevance_output[grad.device]
 
         return _backward_hook_input
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def _create_backward_hook_output(self, outputs: torch.Tensor):
+        # The input hook above passes the stored output relevance through
+        # unchanged, so the stabilized division of the base rule would be
+        # discarded; only record the relevance and leave the gradient as is.
+        # pyre-fixme[3]: Return type must be annotated.
+        # pyre-fixme[2]: Parameter must be annotated.
+        def _backward_hook_output(grad):
+            self.relevance_output[grad.device] = grad.detach()
+            return grad
+
+        return _backward_hook_output
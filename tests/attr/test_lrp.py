@@ -128,6 +128,23 @@ class Test(BaseTest):
         output_after = model(inputs)
         assertTensorAlmostEqual(self, output, output_after)
 
+    def test_lrp_repeat_attributions_after_weight_update(self) -> None:
+        model, inputs = _get_simple_model()
+        model.eval()
+        model.linear.rule = GammaRule()  # type: ignore
+        model.linear2.rule = Alpha1_Beta0_Rule()  # type: ignore
+        lrp = LRP(model)
+        _ = lrp.attribute(inputs)
+        # Parameter updates between attribution calls (e.g. training steps)
+        # must not be reverted by stashes left over from the previous call.
+        with torch.no_grad():
+            model.linear.weight.add_(1.0)  # type: ignore
+        updated_weight = model.linear.weight.detach().clone()  # type: ignore
+        _ = lrp.attribute(inputs)
+        assertTensorAlmostEqual(
+            self, model.linear.weight, updated_weight  # type: ignore
+        )
+
     def test_lrp_simple_inplaceReLU(self) -> None:
         model_default, inputs = _get_simple_model()
         model_inplace, _ = _get_simple_model(inplace=True)